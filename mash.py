@@ -2,6 +2,8 @@
 
 import argparse
 import functools
+import hashlib
+import json
 import logging
 import os
 import platform
@@ -10,9 +12,26 @@ import shlex
 import shutil
 import subprocess
 import sys
-from itertools import product
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Optional, Sequence, Set, Tuple, Union
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Collection,
+    Deque,
+    Dict,
+    Iterable,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
 __NAME__ = "mash.py"
 __version__ = "0.1.0"
@@ -32,67 +51,126 @@ ALL_DIRECTIVES = (
     + ["brew"]
     + EXTRA_DIRECTIVES[BREW_IMPORTANCE:]
 )
+_ALL_DIRECTIVES_SET = frozenset(ALL_DIRECTIVES)
+# Independent of each other; may rely on tools installed by apt or brew
+PARALLEL_DIRECTIVES = ["cargo", "uv", "stow"]
 
 IS_MACOS = platform.system() == "Darwin"
 IS_ARM = platform.processor() == "arm"
 
-DANGEROUS_SHELL_PATTERNS = [
-    re.compile(r"\brm\s+-rf\b"),
-    re.compile(r"\bmkfs\b"),
-    re.compile(r"\bshutdown\b"),
-]
 LONG_OVERRIDE_VAR = (
     "IAMOKAYWITHMASHDOTPYEXECUTINGARBITRARYSHELLCOMMANDS"
     "ANDIKNOWTHEMANYMANYRISKSOFLETTINGASCRIPTDOTHISNONSENSE"
 )
 SIMPLE_OVERRIDE_VAR = "MASH_EXEC_UNSAFE"
+STDERR_TAIL_LINES = 50
+
+_HAS_CURL: Optional[bool] = None  # Resolved on first ensure_curl_available
+
+_DANGER_RE = re.compile(r"\b(?:rm\s+-rf|mkfs|shutdown)\b")
+_COMMENT_RE = re.compile(r"\s*#.*$")
+_QUOTED_RE = re.compile(r"^['\"].*['\"]$")
+# Directive keyword is already known from read_brewfile, so any word will do
+_ARG_RE = re.compile(r"^\s*\w+\s+['\"](.+)['\"]\s*$")
+
+
+@dataclass(frozen=True)
+class Environment:
+    brewfile_path: str
+    homebrew_prefix: Optional[str]
+    cargo_home: str
+    rustup_home: str
+    uv_home: str
+    cache_dir: Path
+    exec_override: bool
+    brew_process_env: Dict[str, str]
+
+    @classmethod
+    def from_environ(cls) -> "Environment":
+        home = Path.home()
+        cargo_home = os.environ.get("CARGO_HOME", str(home / ".cargo"))
+        return cls(
+            brewfile_path=os.environ.get(
+                "BREWFILE_PATH", os.environ.get("MASHFILE_PATH", "./Brewfile")
+            ),
+            homebrew_prefix=os.environ.get("HOMEBREW_PREFIX"),
+            cargo_home=cargo_home,
+            rustup_home=os.environ.get("RUSTUP_HOME", cargo_home),
+            uv_home=os.environ.get("UV_HOME", str(home / ".local/uv")),
+            cache_dir=Path(
+                os.environ.get("XDG_CACHE_HOME", str(home / ".cache"))
+            )
+            / "mash",
+            exec_override=(
+                os.environ.get(LONG_OVERRIDE_VAR) is not None
+                or os.environ.get(SIMPLE_OVERRIDE_VAR) == "1"
+            ),
+            # brew installs hold a global lock, but downloads can overlap
+            brew_process_env={
+                "HOMEBREW_DOWNLOAD_CONCURRENCY": "auto",
+                **os.environ,
+            },
+        )
 
 
-def clean_lines(lines: Sequence[str]) -> Sequence[str]:
-    return [
-        a
-        for a in [
-            re.compile(r"\s*#.*$").sub("", b).strip()
-            for b in [re.compile(r"[\r\n]").sub("", c) for c in lines]
-        ]
-        if a
-    ]
+# Read once at startup; handlers never need to consult os.environ directly
+ENV = Environment.from_environ()
 
 
-def extra_directive(command: str) -> Tuple[str, re.Pattern[str]]:
-    return command, re.compile(rf"^\s*{command}\s+['\"].*['\"]$")
+def clean_lines(lines: Iterable[str]) -> Sequence[str]:
+    # Lines come from file iteration, so only trailing newlines remain
+    cleaned = (
+        _COMMENT_RE.sub("", line.rstrip("\r\n")).strip() for line in lines
+    )
+    return [line for line in cleaned if line]
 
 
-def match_and_doesnt(
-    lines: Sequence[str], pattern: re.Pattern[str]
-) -> Tuple[Sequence[str], Sequence[str]]:
-    matches = [line for line in lines if pattern.match(line)]
-    doesnt = [line for line in lines if not pattern.match(line)]
-    return matches, doesnt
+def directive_argument(line: str) -> Optional[str]:
+    # Fast path for the usual `keyword "value"` shape, regex for anything else
+    rest = line.split(None, 1)[1:]
+    if rest:
+        body = rest[0].rstrip()
+        if len(body) > 2 and body[0] in "'\"" and body[-1] == body[0]:
+            return body[1:-1]
+    match = _ARG_RE.match(line)
+    return match.group(1) if match else None
 
 
 def read_brewfile(
-    file: Path, directives: Sequence[str]
+    file: Path, directives: Tuple[str, ...]
 ) -> Dict[str, Sequence[str]]:
-    with file.open("rt") as conn:
-        lines = clean_lines(conn.readlines())
-
-    # Progressive filtering
-    processed: Dict[str, Sequence[str]] = {}
-    for label, pattern in [
-        extra_directive(directive) for directive in directives
-    ]:
-        matched, lines = match_and_doesnt(lines, pattern)
-        processed[label] = matched
-
-    processed["brew"] = lines  # Remaining lines assumed to be brew directives
+    # The mtime is part of the cache key so an edited file is parsed again.
+    # Copy the dict since callers are free to drop directives from it
+    path = file.resolve()
+    mtime_ns = path.stat().st_mtime_ns
+    return dict(_parse_brewfile(str(path), directives, mtime_ns))
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_brewfile(
+    file: str, directives: Tuple[str, ...], mtime_ns: int
+) -> Dict[str, Sequence[str]]:
+    with open(file, "rt") as conn:
+        lines = clean_lines(conn)
+
+    # Single pass: dispatch on the leading keyword of each line
+    processed: Dict[str, Sequence[str]] = {label: [] for label in directives}
+    brew_lines: Sequence[str] = []
+    for line in lines:
+        head, *rest = line.split(None, 1)
+        if head in processed and rest and _QUOTED_RE.match(rest[0]):
+            processed[head].append(line)
+        else:
+            brew_lines.append(line)  # Remaining lines assumed to be brew
+
+    processed["brew"] = brew_lines
     return processed
 
 
 def order_importance(
     file: Path,
 ) -> Sequence[Tuple[str, Sequence[str]]]:
-    directives_values = read_brewfile(file, EXTRA_DIRECTIVES)
+    directives_values = read_brewfile(file, tuple(EXTRA_DIRECTIVES))
     if IS_MACOS:
         del directives_values["apt"]
     elif IS_ARM:
@@ -101,7 +179,7 @@ def order_importance(
         #       as well.
         #       For now, this is no-op
         pass
-    if extra := set(directives_values.keys()).difference(ALL_DIRECTIVES):
+    if extra := directives_values.keys() - _ALL_DIRECTIVES_SET:
         raise ValueError(f"additional directives {extra} not allowed")
     out: Sequence[Tuple[str, Sequence[str]]] = []
     for directive in ALL_DIRECTIVES:
@@ -111,6 +189,11 @@ def order_importance(
     return out
 
 
+@functools.lru_cache(maxsize=None)
+def _which(program: str) -> Optional[str]:
+    return shutil.which(program)
+
+
 class Command:
     def __init__(
         self,
@@ -118,12 +201,11 @@ class Command:
         arguments: Optional[Union[str, Sequence[str]]] = None,
         sudo: bool = False,
         env: Optional[Dict[str, str]] = None,
-        stdout: Optional[int] = subprocess.PIPE,
     ) -> None:
         # Determine which executable to use
         candidates = [program] if isinstance(program, str) else list(program)
         for prog in candidates:
-            if shutil.which(prog):
+            if _which(prog):
                 self.program = prog
                 break
         else:
@@ -133,9 +215,8 @@ class Command:
         self.arguments = arguments
         self.sudo = sudo
         self.env = env
-        self.stdout = stdout
-        for command, pattern in product(self.argv, DANGEROUS_SHELL_PATTERNS):
-            if pattern.search(command):
+        for arg in self.argv:
+            if _DANGER_RE.search(arg):
                 raise RuntimeError(
                     f"refuse to run dangerous command {self.argv}"
                 )
@@ -158,6 +239,13 @@ class Command:
         return shlex.join(self.argv)
 
 
+def drain_lines(stream: IO[str], sink: Callable[[str], None]) -> None:
+    for line in stream:
+        line = line.rstrip()
+        if line:
+            sink(line)
+
+
 class CmdRunner:
     def __init__(
         self,
@@ -173,61 +261,75 @@ class CmdRunner:
 
     def __call__(
         self, command: Command, exc: Optional[type[Exception]] = None
-    ) -> None:
+    ) -> bool:
         if self.dry:
             self.logger.info(f"[dry-run] {command}")
-            return
+            return True
         if not self.quiet:
             self.logger.info(f"{command}")
-        # Always capture output for logging
-        result = subprocess.run(
+        # Stream output as it arrives, keeping only the tail of stderr
+        err_tail: Deque[str] = deque(maxlen=STDERR_TAIL_LINES)
+
+        def on_stderr(line: str) -> None:
+            if self.verbose:
+                self.logger.debug(line)
+            err_tail.append(line)
+
+        with subprocess.Popen(
             command.argv,
             text=True,
-            capture_output=True if command.stdout is None else False,
-            stdout=command.stdout,
+            bufsize=1,
+            stdout=subprocess.PIPE if self.verbose else subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
             env=command.env,
-        )
-        out = result.stdout.strip() if result.stdout else ""
-        err = result.stderr.strip() if result.stderr else ""
-        if self.verbose:
-            if out:
-                self.logger.debug(out)
-            if err:
-                self.logger.debug(err)
-        if result.returncode:
+        ) as proc:
+            reader = threading.Thread(
+                target=drain_lines, args=(proc.stderr, on_stderr)
+            )
+            reader.start()
+            if proc.stdout is not None:
+                drain_lines(proc.stdout, self.logger.debug)
+            reader.join()
+        err = "\n".join(err_tail)
+        if proc.returncode:
             if exc:
                 self.logger.error(err)
-                raise exc(
-                    f"{command} failed with exit code {result.returncode}"
-                )
+                raise exc(f"{command} failed with exit code {proc.returncode}")
             else:
                 self.logger.warning(
-                    f"{command} failed with exit code {result.returncode}"
+                    f"{command} failed with exit code {proc.returncode}"
                 )
                 if err:
                     self.logger.warning(err)
-        elif not self.quiet:
+            return False
+        if not self.quiet:
             self.logger.info(f"{command} completed successfully")
+        return True
 
 
-@functools.lru_cache(maxsize=1)
-def ensure_curl_available(runner: CmdRunner) -> bool:
-    import shutil
+def directive_arguments(
+    args: Sequence[str], directive: str, runner: CmdRunner
+) -> Sequence[str]:
+    values = [directive_argument(line) for line in args]
+    for line, value in zip(args, values):
+        if value is None:
+            runner.logger.warning(
+                f"Unrecognized {directive} directive: {line}"
+            )
+    return [value for value in values if value is not None]
+
 
-    if shutil.which("curl") is None:
+def ensure_curl_available(runner: CmdRunner) -> bool:
+    global _HAS_CURL
+    if _HAS_CURL is None:
+        _HAS_CURL = shutil.which("curl") is not None
+    if not _HAS_CURL:
         runner.logger.error("curl is required but not found in PATH.")
-        return False
-    return True
+    return _HAS_CURL
 
 
 def get_brewfile(proposed_path: Optional[str]) -> Path:
-    brewfile_location = (
-        proposed_path
-        if proposed_path
-        else os.environ.get(
-            "BREWFILE_PATH", os.environ.get("MASHFILE_PATH", "./Brewfile")
-        )
-    )
+    brewfile_location = proposed_path if proposed_path else ENV.brewfile_path
     brewfile = Path(brewfile_location).expanduser().resolve()
     if not brewfile.exists():
         raise FileNotFoundError(
@@ -242,12 +344,7 @@ def handle_shell(args: Sequence[str], runner: CmdRunner, unsafe: bool) -> None:
     shell_cmds = "\n\t" + "\n\t".join(args)
 
     # Check environment variables for override
-    env_override = (
-        os.environ.get(LONG_OVERRIDE_VAR) is not None
-        or os.environ.get(SIMPLE_OVERRIDE_VAR) == "1"
-    )
-
-    if env_override:
+    if ENV.exec_override:
         logger.info(f"running commands: {shell_cmds}")
     elif unsafe:
         logger.warning(
@@ -265,55 +362,50 @@ def handle_shell(args: Sequence[str], runner: CmdRunner, unsafe: bool) -> None:
         return
 
     for line in args:
-        match = re.match(r'^\s*shell\s+[\'"](.+)[\'"]$', line)
-        if not match:
+        value = directive_argument(line)
+        if value is None:
             runner.logger.warning(f"Unrecognized shell directive: {line}")
             continue
 
-        command_str = match.group(1)
+        command_str = value
         cmd = Command(program="/bin/sh", arguments=["-c", command_str])
         runner(cmd, exc=RuntimeError)
 
 
-def handle_apt(args: Sequence[str], runner: CmdRunner) -> None:
-    import subprocess
-
+def handle_apt(
+    args: Sequence[str], runner: CmdRunner, skip_update: bool = False
+) -> None:
     # Extract package names from lines like: apt "pkgname"
-    apt_packages: Sequence[str] = []
-    for line in args:
-        match = re.match(r'^\s*apt\s+[\'"](.*)[\'"]$', line)
-        if not match:
-            runner.logger.warning(f"Unrecognized apt directive: {line}")
-            continue
-        apt_packages.append(match.group(1))
+    apt_packages = directive_arguments(args, "apt", runner)
 
     if not apt_packages:
         runner.logger.info("No apt packages to install.")
         return
+    apt_set = set(apt_packages)
 
     # Update and upgrade the package lists
-    runner(Command("apt", ["update"], sudo=True))
+    if not skip_update:
+        runner(Command("apt", ["update"], sudo=True))
     runner(Command("apt", ["upgrade", "-y"], sudo=True))
 
     # Install required packages
     runner(Command("apt", ["install", "-y"] + apt_packages, sudo=True))
 
-    # Get current manually installed packages
-    try:
-        result = subprocess.run(
-            ["apt-mark", "showmanual"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        manually_installed = set(result.stdout.strip().splitlines())
-    except subprocess.CalledProcessError as e:
+    # Get current manually installed packages, one line at a time
+    with subprocess.Popen(
+        ["apt-mark", "showmanual"], stdout=subprocess.PIPE, text=True
+    ) as proc:
+        manually_installed = {line.rstrip("\n") for line in proc.stdout}
+    if proc.returncode:
         runner.logger.error("Failed to retrieve manually installed packages.")
-        runner.logger.debug(f"{e}")
+        runner.logger.debug(
+            f"{shlex.join(proc.args)} failed with exit code {proc.returncode}"
+        )
         return
+    manually_installed.discard("")
 
     # Determine which manual packages should be removed
-    to_remove = sorted(manually_installed - set(apt_packages))
+    to_remove = sorted(manually_installed.difference(apt_set))
     if to_remove:
         runner.logger.info(
             "Removing packages no longer listed in the Brewfile:"
@@ -329,11 +421,51 @@ def handle_apt(args: Sequence[str], runner: CmdRunner) -> None:
     runner(Command("apt", ["autoclean"], sudo=True))
 
 
-def handle_brew(args: Sequence[str], runner: CmdRunner) -> None:
-    import tempfile
+def read_stamp(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
 
+def write_stamp(
+    path: Path, state: Optional[Dict[str, Any]], logger: logging.Logger
+) -> None:
+    if state is None:
+        return
+    # Best effort: a read-only cache only costs the next run a bundle
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(state))
+    except OSError as e:
+        logger.debug(f"Could not write {path}: {e}")
+
+
+def brew_bundle_state(
+    brew_path: str, args: Sequence[str]
+) -> Optional[Dict[str, Any]]:
+    # `brew --prefix` is answered by brew.sh without booting Ruby
+    result = subprocess.run(
+        [brew_path, "--prefix"], capture_output=True, text=True
+    )
+    if result.returncode:
+        return None
+    prefix = Path(result.stdout.strip())
+    # Top-level mtimes change whenever a formula or cask is added or removed
+    state: Dict[str, Any] = {
+        "brewfile": hashlib.sha256("\n".join(args).encode()).hexdigest()
+    }
+    for name in ("Cellar", "Caskroom"):
+        try:
+            state[name] = (prefix / name).stat().st_mtime_ns
+        except FileNotFoundError:
+            state[name] = None
+    return state
+
+
+def brew_executable() -> str:
     # Resolve brew path using environment variables or standard defaults
-    brew_env = os.environ.get("HOMEBREW_PREFIX")
+    brew_env = ENV.homebrew_prefix
     brew_path = shutil.which("brew")
 
     if not brew_path:
@@ -343,8 +475,43 @@ def handle_brew(args: Sequence[str], runner: CmdRunner) -> None:
             else:
                 brew_env = str(Path.home() / ".linuxbrew")
         brew_path = str(Path(brew_env) / "bin" / "brew")
-
-    if not Path(brew_path).is_file():
+    return brew_path
+
+
+def tool_executable(name: str, prefix: str) -> str:
+    return shutil.which(name) or str(Path(prefix) / "bin" / name)
+
+
+def prefetch_updates(
+    directives: Dict[str, Sequence[str]], runner: CmdRunner
+) -> Set[str]:
+    # Refreshing each package index is an independent network fetch
+    updates: Dict[str, Command] = {}
+    if directives.get("apt") and _which("apt"):
+        updates["apt"] = Command("apt", ["update"], sudo=True)
+    if "brew" in directives and os.path.isfile(brew_path := brew_executable()):
+        updates["brew"] = Command(brew_path, ["update"])
+    rustup_path = tool_executable("rustup", ENV.cargo_home)
+    if "cargo" in directives and os.path.isfile(rustup_path):
+        updates["cargo"] = Command(rustup_path, ["self", "update"])
+    uv_path = tool_executable("uv", ENV.uv_home)
+    if "uv" in directives and os.path.isfile(uv_path):
+        updates["uv"] = Command(uv_path, ["self", "update"])
+    if not updates:
+        return set()
+
+    runner.logger.info(f"updating {', '.join(updates)} package indexes")
+    with ThreadPoolExecutor(max_workers=len(updates)) as executor:
+        for future in [executor.submit(runner, c) for c in updates.values()]:
+            future.result()
+    return set(updates)
+
+
+def handle_brew(
+    args: Sequence[str], runner: CmdRunner, skip_update: bool = False
+) -> None:
+    brew_path = brew_executable()
+    if not os.path.isfile(brew_path):
         if not (ensure_curl_available(runner) and shutil.which("git")):
             runner.logger.warning(
                 "Homebrew requires both curl and git to install."
@@ -362,38 +529,53 @@ def handle_brew(args: Sequence[str], runner: CmdRunner) -> None:
             )
         )
 
-    if not Path(brew_path).is_file():
+    if not os.path.isfile(brew_path):
         runner.logger.error("brew not found after attempted installation.")
         return
 
     # Update and upgrade brew
-    runner(Command(brew_path, ["update"]))
-    runner(Command(brew_path, ["upgrade"]))
-
-    # Write Brewfile contents to a temp file and bundle install
-    with tempfile.NamedTemporaryFile(mode="w", delete=False) as temp:
-        for line in args:
-            temp.write(line + "")
-        temp_path = temp.name
+    if not skip_update:
+        runner(Command(brew_path, ["update"]))
+    runner(Command(brew_path, ["upgrade"], env=ENV.brew_process_env))
+
+    # Skip the bundle when neither the Brewfile nor the installed set moved
+    stamp = ENV.cache_dir / "brew-bundle.json"
+    state = brew_bundle_state(brew_path, args)
+    bundled = False
+    if state is not None and state == read_stamp(stamp):
+        runner.logger.info("Brewfile and Cellar unchanged; skipping bundle")
+    else:
+        # Write Brewfile contents to a temp file and bundle install
+        with tempfile.NamedTemporaryFile(mode="w", delete=False) as temp:
+            for line in args:
+                temp.write(line + "")
+            temp_path = temp.name
 
-    runner(Command(brew_path, ["bundle", "--file", temp_path]))
+        bundled = runner(
+            Command(
+                brew_path,
+                ["bundle", "--file", temp_path],
+                env=ENV.brew_process_env,
+            )
+        )
+        os.remove(temp_path)
 
     # Cleanup unused packages
     runner(Command(brew_path, ["cleanup"]))
-    os.remove(temp_path)
-
+    if bundled and not runner.dry:
+        write_stamp(
+            stamp, brew_bundle_state(brew_path, args), runner.logger
+        )
 
-def handle_cargo(args: Sequence[str], runner: CmdRunner) -> None:
-    import os
-    import shutil
-    import subprocess
 
-    prefix = os.environ.get("CARGO_HOME", str(Path.home() / ".cargo"))
-    bin_dir = Path(prefix) / "bin"
-    cargo_path = shutil.which("cargo") or str(bin_dir / "cargo")
-    rustup_path = shutil.which("rustup") or str(bin_dir / "rustup")
+def handle_cargo(
+    args: Sequence[str], runner: CmdRunner, skip_update: bool = False
+) -> None:
+    prefix = ENV.cargo_home
+    cargo_path = tool_executable("cargo", prefix)
+    rustup_path = tool_executable("rustup", prefix)
 
-    if not Path(rustup_path).is_file():
+    if not os.path.isfile(rustup_path):
         if not ensure_curl_available(runner):
             runner.logger.warning(
                 "rustup/cargo is not present and it requires curl to install"
@@ -410,7 +592,6 @@ def handle_cargo(args: Sequence[str], runner: CmdRunner) -> None:
                     "-sSf",
                     "https://sh.rustup.rs",
                 ],
-                stdout=None,
             )
         )
         runner(
@@ -419,34 +600,29 @@ def handle_cargo(args: Sequence[str], runner: CmdRunner) -> None:
                 ["-s", "--", "-y"],
                 env={
                     "CARGO_HOME": prefix,
-                    "RUSTUP_HOME": os.environ.get("RUSTUP_HOME", prefix),
+                    "RUSTUP_HOME": ENV.rustup_home,
                 },
             )
         )
 
-    if not Path(cargo_path).is_file() or not Path(rustup_path).is_file():
+    if not os.path.isfile(cargo_path) or not os.path.isfile(rustup_path):
         runner.logger.error(
             "Cargo or rustup not found even after installation."
         )
         return
 
-    runner(Command(rustup_path, ["self", "update"]))
+    if not skip_update:
+        runner(Command(rustup_path, ["self", "update"]))
     runner(Command(cargo_path, ["install-update", "-a"]))
 
-    cargo_packages: Sequence[str] = []
-    for line in args:
-        match = re.match(r'^\s*cargo\s+[\'"](.*)[\'"]$', line)
-        if not match:
-            runner.logger.warning(f"Unrecognized cargo directive: {line}")
-            continue
-        cargo_packages.append(match.group(1))
+    cargo_packages = directive_arguments(args, "cargo", runner)
 
     if not cargo_packages:
         runner.logger.info("No cargo packages to install.")
         return
 
-    for pkg in cargo_packages:
-        runner(Command(cargo_path, ["install", pkg]))
+    # One cargo process resolves the registry index once for every crate
+    runner(Command(cargo_path, ["install", *cargo_packages]))
 
     try:
         result = subprocess.run(
@@ -471,14 +647,15 @@ def handle_cargo(args: Sequence[str], runner: CmdRunner) -> None:
         )
         for pkg in to_remove:
             runner.logger.info(f"  {pkg}")
-            runner(Command(cargo_path, ["uninstall", pkg]))
+        runner(Command(cargo_path, ["uninstall", *to_remove]))
 
 
-def handle_uv(args: Sequence[str], runner: CmdRunner) -> None:
-    prefix = os.environ.get("UV_HOME", str(Path.home() / ".local/uv"))
-    bin_dir = Path(prefix) / "bin"
-    uv_path = shutil.which("uv") or str(bin_dir / "uv")
-    uv_installed = Path(uv_path).is_file()
+def handle_uv(
+    args: Sequence[str], runner: CmdRunner, skip_update: bool = False
+) -> None:
+    prefix = ENV.uv_home
+    uv_path = tool_executable("uv", prefix)
+    uv_installed = os.path.isfile(uv_path)
 
     if not uv_installed:
         if not ensure_curl_available(runner):
@@ -487,30 +664,19 @@ def handle_uv(args: Sequence[str], runner: CmdRunner) -> None:
             )
             return
         runner.logger.info("Installing uv using upstream method...")
-        runner(
-            Command(
-                "curl",
-                ["-LsSf", "https://astral.sh/uv/install.sh"],
-                stdout=None,
-            )
-        )
+        runner(Command("curl", ["-LsSf", "https://astral.sh/uv/install.sh"]))
         runner(Command("sh", ["-s"], env={"UV_HOME": prefix}))
 
-    if not Path(uv_path).is_file():
+    if not os.path.isfile(uv_path):
         runner.logger.error("uv not found after attempted installation.")
         return
     elif not uv_installed:  # Things to do after first install
         pass  # TODO: symlink python and python3 from uv
 
-    runner(Command(uv_path, ["self", "update"]))
+    if not skip_update:
+        runner(Command(uv_path, ["self", "update"]))
 
-    uv_packages: Sequence[str] = []
-    for line in args:
-        match = re.match(r'^\s*uv\s+[\'"](.*)[\'"]$', line)
-        if not match:
-            runner.logger.warning(f"Unrecognized uv directive: {line}")
-            continue
-        uv_packages.append(match.group(1))
+    uv_packages = directive_arguments(args, "uv", runner)
 
     if not uv_packages:
         runner.logger.info("No uv packages to install.")
@@ -552,81 +718,106 @@ def handle_stow(args: Sequence[str], runner: CmdRunner) -> None:
         return
 
     home = Path.home()
-    valid_dirs: Sequence[Path] = []
-
-    for line in args:
-        match = re.match(r'^\s*stow\s+[\'"](.*)[\'"]$', line)
-        if not match:
-            runner.logger.warning(f"Unrecognized stow directive: {line}")
-            continue
-
-        stow_target = Path(match.group(1)).expanduser()
-        if not stow_target.is_absolute():
-            stow_target = home / stow_target
-
-        if not stow_target.exists():
-            runner.logger.warning(f"Directory not found: {stow_target}")
-            continue
-
-        valid_dirs.append(stow_target)
+    # Joining onto home leaves absolute paths untouched
+    stow_targets = [
+        home / Path(value).expanduser()
+        for value in directive_arguments(args, "stow", runner)
+    ]
+    # One directory listing per parent instead of one stat per target
+    present: Dict[Path, Set[str]] = {}
+    for parent in {target.parent for target in stow_targets}:
+        try:
+            with os.scandir(parent) as entries:
+                # A dangling symlink is listed but does not exist()
+                present[parent] = {
+                    entry.name
+                    for entry in entries
+                    if not entry.is_symlink() or os.path.exists(entry.path)
+                }
+        except OSError:
+            present[parent] = set()
+
+    valid_dirs: Sequence[Tuple[str, str]] = []
+    for target in stow_targets:
+        # Names the listing cannot answer for ("..", unreadable parents)
+        # fall back to a stat
+        if target.name in present[target.parent] or target.exists():
+            valid_dirs.append((str(target.parent), target.name))
+        else:
+            runner.logger.warning(f"Directory not found: {target}")
 
     if not valid_dirs:
         runner.logger.info("No valid stow directories to process.")
         return
 
+    target_dir = str(home)
     # First unstow everything to ensure a clean resymlink
-    for target in valid_dirs:
+    for parent, name in valid_dirs:
         runner(
             Command(
                 stow_path,
-                [
-                    "--dir",
-                    str(target.parent),
-                    "--target",
-                    str(home),
-                    "--delete",
-                    target.name,
-                ],
+                ["--dir", parent, "--target", target_dir, "--delete", name],
             )
         )
 
     # Then restow each directory
-    for target in valid_dirs:
+    for parent, name in valid_dirs:
         runner(
             Command(
-                stow_path,
-                [
-                    "--dir",
-                    str(target.parent),
-                    "--target",
-                    str(home),
-                    target.name,
-                ],
+                stow_path, ["--dir", parent, "--target", target_dir, name]
             )
         )
 
 
+def run_directive(
+    action: str,
+    args: Sequence[str],
+    runner: CmdRunner,
+    unsafe: bool = False,
+    updated: Collection[str] = (),
+) -> None:
+    runner.logger.info(f"running {action}-based commands")
+    skip_update = action in updated
+    if action == "shell":
+        handle_shell(args, runner, unsafe)
+    elif action == "apt":
+        handle_apt(args, runner, skip_update)
+    elif action == "brew":
+        handle_brew(args, runner, skip_update)
+    elif action == "cargo":
+        handle_cargo(args, runner, skip_update)
+    elif action == "uv":
+        handle_uv(args, runner, skip_update)
+    elif action == "stow":
+        handle_stow(args, runner)
+    else:
+        # Code is theoretically unreachable
+        raise ValueError(f"unknown directive {action}")
+
+
 def main(brewfile: Path, runner: CmdRunner, unsafe: bool = False) -> None:
-    for action, args in order_importance(brewfile):
-        runner.logger.info(f"running {action}-based commands")
+    directives = order_importance(brewfile)
+    parallel: Sequence[Tuple[str, Sequence[str]]] = []
+    updated: Set[str] = set()
+    for action, args in directives:
+        if action in PARALLEL_DIRECTIVES:
+            parallel.append((action, args))
+            continue
+        run_directive(action, args, runner, unsafe, updated)
         if action == "shell":
-            handle_shell(args, runner, unsafe)
-        elif action == "apt":
-            handle_apt(args, runner)
-        elif action == "brew":
-            handle_brew(args, runner)
-            pass
-        elif action == "cargo":
-            handle_cargo(args, runner)
-            pass
-        elif action == "uv":
-            handle_uv(args, runner)
-            pass
-        elif action == "stow":
-            handle_stow(args, runner)
-        else:
-            # Code is theoretically unreachable
-            break
+            # After shell, which may add package sources or install tools
+            updated = prefetch_updates(dict(directives), runner)
+
+    # These all come after brew and only wait on subprocess I/O, so overlap
+    with ThreadPoolExecutor(max_workers=len(PARALLEL_DIRECTIVES)) as executor:
+        futures = [
+            executor.submit(
+                run_directive, action, args, runner, unsafe, updated
+            )
+            for action, args in parallel
+        ]
+        for future in futures:
+            future.result()
 
 
 if __name__ == "__main__":
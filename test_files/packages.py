@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 
 import argparse
+import functools
 import logging
 import shlex
 import shutil
@@ -32,6 +33,11 @@ other = parser.add_subparsers(title="test")
 logger = logging.Logger(name=parser.prog)
 
 
+@functools.lru_cache(maxsize=None)
+def _which(program: str) -> Optional[str]:
+    return shutil.which(program)
+
+
 class Command:
     def __init__(
         self,
@@ -42,7 +48,7 @@ class Command:
         # Determine which executable to use
         candidates = [program] if isinstance(program, str) else list(program)
         for prog in candidates:
-            if shutil.which(prog):
+            if _which(prog):
                 self.program = prog
                 break
         else:
@@ -2,18 +2,22 @@
 __version__ = "0.1.0"
 
 import argparse
+import asyncio
+import functools
 import logging
+import os
+import re
 import shlex
 import shutil
 import subprocess
 import sys
+from collections import deque
 from collections.abc import Callable
 from pathlib import Path
-from typing import Optional, Sequence, Union
+from typing import Deque, Optional, Sequence, Union
 
 # --- Logging setup ------------------------------------------------------------
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO, format="%(message)s")
 
 # --- Version check -----------------------------------------------------------
 if sys.version_info < (3, 9):
@@ -23,7 +27,7 @@ if sys.version_info < (3, 9):
 HOME = Path.home()
 DOTFILES = HOME / "dotfiles"
 PACKAGE_LIST = DOTFILES / "package-list"
-STOW_IGNORE: list[str] = []  # to be populated later
+STOW_IGNORE: frozenset[str] = frozenset()  # to be populated later
 
 
 # --- Exceptions --------------------------------------------------------------
@@ -39,7 +43,24 @@ class NotInstalledError(PackagingError): pass # noqa: E701
 
 
 # --- Command wrapper --------------------------------------------------------
+@functools.lru_cache(maxsize=None)
+def _which(program: str) -> Optional[str]:
+    return shutil.which(program)
+
+
+_SUDO = shutil.which("sudo") or "/usr/bin/sudo"
+
+
 class Command:
+    __slots__ = (
+        "program",
+        "arguments",
+        "sudo",
+        "executable",
+        "_argv",
+        "_repr",
+    )
+
     def __init__(
         self,
         program: Union[str, Sequence[str]],
@@ -47,9 +68,10 @@ class Command:
         sudo: bool = False,
     ) -> None:
         # Determine which executable to use
-        candidates = [program] if isinstance(program, str) else list(program)
+        candidates = (program,) if isinstance(program, str) else program
         for prog in candidates:
-            if shutil.which(prog):
+            resolved = _which(prog)
+            if resolved:
                 self.program = prog
                 break
         else:
@@ -58,78 +80,168 @@ class Command:
             )
         self.arguments = arguments
         self.sudo = sudo
+        # Commands are never mutated, so build argv and its repr once
+        if arguments is None:
+            args: Sequence[str] = ()
+        elif isinstance(arguments, str):
+            args = (arguments,)
+        else:
+            args = arguments
+        if sudo:
+            self._argv: Sequence[str] = ("sudo", self.program, *args)
+        else:
+            self._argv = (self.program, *args)
+        # Absolute path of argv[0], so the child execs it without a PATH walk
+        self.executable = _SUDO if sudo else resolved
+        self._repr = shlex.join(self._argv)
 
     @property
     def argv(self) -> Sequence[str]:
-        # Build the base command
-        if self.arguments is None:
-            cmd = [self.program]
-        elif isinstance(self.arguments, str):
-            cmd = [self.program, self.arguments]
-        else:
-            cmd = [self.program, *list(self.arguments)]
-        # Prepend sudo if requested
-        if self.sudo:
-            cmd = ["sudo", *cmd]
-        return cmd
+        return self._argv
 
     def __repr__(self) -> str:
-        return shlex.join(self.argv)
+        return self._repr
 
 
 # --- Command runner ---------------------------------------------------------
+STDERR_TAIL_LINES = 200
+READ_CHUNK_SIZE = 2**16
+MAX_LINE_LENGTH = 2**20
+
+
 class CmdRunner:
     def __init__(
         self,
         dry: bool = False,
         verbose: bool = False,
         quiet: bool = False,
+        max_concurrent: int = 4,
     ) -> None:
         self.dry = dry
         self.verbose = verbose
         self.quiet = quiet
-
-    def __call__(
+        self.max_concurrent = max_concurrent
+        # Created on first use so they bind to the running loop on 3.9
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._sudo_slot: Optional[asyncio.Semaphore] = None
+
+    async def _spawn(self, command: Command) -> tuple[int, str]:
+        proc = await asyncio.create_subprocess_exec(
+            *command.argv,
+            executable=command.executable,
+            stdin=subprocess.DEVNULL,
+            # stdout is only logged when verbose; stderr is needed for errors
+            stdout=subprocess.PIPE if self.verbose else subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        # Log lines as they arrive; only the stderr tail is kept for errors
+        tail: Deque[str] = deque(maxlen=STDERR_TAIL_LINES)
+
+        def emit(raw: bytes, keep: bool) -> None:
+            line = raw.decode(errors="replace").rstrip()
+            if self.verbose:
+                logger.debug(line)
+            if keep:
+                tail.append(line)
+
+        async def drain(stream: asyncio.StreamReader, keep: bool) -> None:
+            # Fixed-size reads rather than readline(): progress bars redraw
+            # with "\r" and can emit megabytes without a newline
+            pending = b""
+            while chunk := await stream.read(READ_CHUNK_SIZE):
+                *lines, pending = (pending + chunk).split(b"\n")
+                for raw in lines:
+                    emit(raw, keep)
+                if len(pending) > MAX_LINE_LENGTH:
+                    emit(pending, keep)
+                    pending = b""
+            if pending:
+                emit(pending, keep)
+
+        async def discard(stream: asyncio.StreamReader) -> None:
+            while await stream.read(READ_CHUNK_SIZE):
+                pass
+
+        assert proc.stderr is not None
+        streams = [(proc.stderr, True)]
+        if proc.stdout is not None:
+            streams.append((proc.stdout, False))
+        try:
+            await asyncio.gather(*(drain(*s) for s in streams))
+            returncode = await proc.wait()
+        except asyncio.CancelledError:
+            # Do not leave the child running when a sibling manager failed.
+            # wait() also waits for the pipes to close, so keep emptying
+            # them: a grandchild still writing would block on a full pipe
+            try:
+                proc.terminate()
+            except ProcessLookupError:
+                pass
+            await asyncio.gather(*(discard(s) for s, _ in streams))
+            await proc.wait()
+            raise
+        return returncode, "\n".join(tail).strip()
+
+    async def __call__(
         self, command: Command, exc: Optional[type[Exception]] = None
-    ) -> None:
+    ) -> int:
         if self.dry:
-            logger.info(f"[dry-run] {command}")
-            return
+            logger.info("[dry-run] %s", command)
+            return 0
         if not self.quiet:
-            logger.info(f"{command}")
-        # Always capture output for logging
-        result = subprocess.run(command.argv, text=True, capture_output=True)
-        out = result.stdout.strip() if result.stdout else ""
-        err = result.stderr.strip() if result.stderr else ""
-        if self.verbose:
-            if out:
-                logger.debug(out)
-            if err:
-                logger.debug(err)
-        if result.returncode:
+            logger.info("%s", command)
+        if self._slots is None or self._sudo_slot is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+            self._sudo_slot = asyncio.Semaphore(1)
+        async with self._slots:
+            if command.sudo:
+                # Concurrent sudo prompts and apt/dpkg locks do not mix
+                async with self._sudo_slot:
+                    returncode, err = await self._spawn(command)
+            else:
+                returncode, err = await self._spawn(command)
+        if returncode:
             if exc:
                 logger.error(err)
                 raise exc(
-                    f"{command} failed with exit code {result.returncode}"
+                    f"{command} failed with exit code {returncode}"
                 )
             else:
                 logger.warning(
-                    f"{command} failed with exit code {result.returncode}"
+                    "%s failed with exit code %d", command, returncode
                 )
                 if err:
                     logger.warning(err)
         elif not self.quiet:
-            logger.info(f"{command} completed successfully")
+            logger.info("%s completed successfully", command)
+        return returncode
 
 
 # --- Package manager abstraction --------------------------------------------
+# Exit status of the fused shell script is this plus the failing step
+FUSED_STEP_EXIT_BASE = 200
+
+
 class PackageManager:
+    __slots__ = (
+        "name",
+        "runner",
+        "program",
+        "bootstrap_cmd",
+        "use_sudo",
+        "fuse_steps",
+        "_update_args",
+        "_install_args",
+        "_cleanup_args",
+        "_uninstall_args",
+    )
+
     def __init__(
         self,
         name: str,
         runner: CmdRunner,
         program: Union[str, Sequence[str]],
-        bootstrap_cmd: Command,
+        bootstrap_cmd: Callable[[], Command],
         update_args: Optional[
             Union[Sequence[str], Callable[[], Sequence[str]]]
         ],
@@ -143,12 +255,14 @@ class PackageManager:
             Union[Sequence[str], Callable[[], Sequence[str]]]
         ] = None,
         use_sudo: bool = False,
+        fuse_steps: bool = False,
     ) -> None:
         self.name = name
         self.runner = runner
         self.program = program
         self.bootstrap_cmd = bootstrap_cmd
         self.use_sudo = use_sudo
+        self.fuse_steps = fuse_steps
         self._update_args = update_args
         self._install_args = install_args
         self._cleanup_args = cleanup_args
@@ -157,81 +271,142 @@ class PackageManager:
     @property
     def installed(self) -> bool:
         candidates = (
-            [self.program]
-            if isinstance(self.program, str)
-            else list(self.program)
+            (self.program,) if isinstance(self.program, str) else self.program
         )
-        return any(shutil.which(c) for c in candidates if isinstance(c, str))
+        return any(_which(c) for c in candidates if isinstance(c, str))
 
     def _get_args(
         self, args_source: Union[Sequence[str], Callable[[], Sequence[str]]]
     ) -> Sequence[str]:
         return args_source() if callable(args_source) else args_source
 
-    def bootstrap(self) -> None:
+    async def bootstrap(self) -> None:
         if not self.installed:
-            self.runner(self.bootstrap_cmd, BootstrapError)
+            # Built on demand: installed tools never pay for its lookups
+            await self.runner(self.bootstrap_cmd(), BootstrapError)
+            _which.cache_clear()  # The bootstrap may have added the program
         else:
-            logger.info(f"{self.name} present; skip bootstrap")
+            logger.info("%s present; skip bootstrap", self.name)
 
-    def update(self) -> None:
+    async def update(self) -> None:
         if self.installed and self._update_args:
             args = self._get_args(self._update_args)
             cmd = Command(self.program, args, sudo=self.use_sudo)
-            self.runner(cmd, UpdateError)
+            await self.runner(cmd, UpdateError)
 
-    def install(self) -> None:
+    async def install(self) -> None:
         if self.installed and self._install_args:
             args = self._get_args(self._install_args)
             cmd = Command(self.program, args, sudo=self.use_sudo)
-            self.runner(cmd, InstallError)
+            await self.runner(cmd, InstallError)
         else:
-            logger.info(f"{self.name} not present; skip install")
+            logger.info("%s not present; skip install", self.name)
 
-    def cleanup(self) -> None:
+    async def cleanup(self) -> None:
         if self.installed and self._cleanup_args:
             args = self._get_args(self._cleanup_args)
             cmd = Command(self.program, args, sudo=self.use_sudo)
-            self.runner(cmd, CleanupError)
+            await self.runner(cmd, CleanupError)
 
-    def uninstall(self) -> None:
+    async def uninstall(self) -> None:
         if self.installed and self._uninstall_args:
             args = self._get_args(self._uninstall_args)
             cmd = Command(self.program, args, sudo=self.use_sudo)
-            self.runner(cmd, UninstallError)
+            await self.runner(cmd, UninstallError)
+
+    async def run_fused(self) -> None:
+        # One shell (and one sudo) for update, install and cleanup; each
+        # step exits with its own status so failures keep their type
+        program = Command(self.program).program
+        steps = []
+        for args_source, exc in (
+            (self._update_args, UpdateError),
+            (self._install_args, InstallError),
+            (self._cleanup_args, CleanupError),
+        ):
+            args = self._get_args(args_source) if args_source else None
+            if args:
+                steps.append((shlex.join([program, *args]), exc))
+        if not steps:
+            return
+        script = "; ".join(
+            f"{step} || exit {FUSED_STEP_EXIT_BASE + i}"
+            for i, (step, _) in enumerate(steps)
+        )
+        cmd = Command("sh", ["-c", script], sudo=self.use_sudo)
+        returncode = await self.runner(cmd)
+        if returncode:
+            index = returncode - FUSED_STEP_EXIT_BASE
+            step, exc = (
+                steps[index]
+                if 0 <= index < len(steps)
+                else (str(cmd), PackagingError)
+            )
+            raise exc(f"{step} failed (exit code {returncode})")
 
-    def __call__(self) -> None:
-        self.bootstrap()
-        self.update()
-        self.install()
-        self.cleanup()
+    async def __call__(self) -> None:
+        # The steps of one manager stay in order; managers run side by side
+        await self.bootstrap()
+        if not self.installed:
+            logger.warning("%s still not installed; skipping", self.name)
+            return
+        if self.fuse_steps:
+            await self.run_fused()
+            return
+        await self.update()
+        await self.install()
+        await self.cleanup()
 
 
 # --- Factory functions ------------------------------------------------------
+# One entry per non-blank, non-comment line, surrounding whitespace removed
+_PKG_RE = re.compile(rb"(?m)^[ \t]*([^#\s][^\n]*?)[ \t\r]*$")
+
+
+def read_package_list(path: Path, manager: str) -> list[str]:
+    # A single open() both checks for the file and reads it
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        raise InstallError(f"cannot find {path} for {manager}") from None
+    return [m.decode() for m in _PKG_RE.findall(data)]
+
+
+def missing_package_lists(names: Sequence[str]) -> list[str]:
+    # One directory listing answers for every file at once
+    try:
+        with os.scandir(PACKAGE_LIST) as it:
+            present = {entry.name for entry in it if entry.is_file()}
+    except OSError:
+        present = set()
+    return [name for name in names if name not in present]
+
+
 def create_managers(runner: CmdRunner) -> Sequence[PackageManager]:
+    # Report every missing list together rather than one per run
+    missing = missing_package_lists(
+        ["aptfile", "Brewfile", "cargofile", "pipfile"]
+    )
+    if missing:
+        raise InstallError(
+            f"missing package lists in {PACKAGE_LIST}: {', '.join(missing)}"
+        )
+
     # Setup apt
-    aptfile = PACKAGE_LIST / "aptfile"
-    if not aptfile.exists():
-        raise InstallError(f"cannot find {aptfile} for apt")
-    packages = [
-        ln.strip()
-        for ln in aptfile.read_text().splitlines()
-        if ln.strip() and not ln.startswith("#")
-    ]
+    packages = read_package_list(PACKAGE_LIST / "aptfile", "apt")
     apt = PackageManager(
         name="apt",
         runner=runner,
-        program="/usr/bin/apt",
-        bootstrap_cmd=Command("true"),
+        program="/usr/bin/apt-get",
+        bootstrap_cmd=lambda: Command("true"),
         update_args=["update"],
         install_args=["install", "-y", *packages],
         cleanup_args=["autoremove", "-y"],
         use_sudo=True,
+        fuse_steps=True,
     )
 
     brewfile = PACKAGE_LIST / "Brewfile"
-    if not brewfile.exists():
-        raise InstallError(f"cannot find {brewfile} for Homebrew")
     brew = PackageManager(
         name="brew",
         runner=runner,
@@ -241,14 +416,15 @@ def create_managers(runner: CmdRunner) -> Sequence[PackageManager]:
             "/usr/local/Homebrew/bin/brew",
             "/home/linuxbrew/.linuxbrew/bin/brew",
         ],
-        bootstrap_cmd=Command(
+        bootstrap_cmd=lambda: Command(
             "sh",
             [
                 "-c",
                 "NONINTERACTIVE=1 curl -fsSL https://raw.githubusercontent.com/Homebrew/install/HEAD/install.sh | bash",
             ],
         ),
-        update_args=["update"],
+        # bundle auto-updates and runs periodic cleanup itself
+        update_args=None,
         install_args=[
             "bundle",
             "--file",
@@ -257,22 +433,15 @@ def create_managers(runner: CmdRunner) -> Sequence[PackageManager]:
             "--force",
             "--quiet",
         ],
-        cleanup_args=["cleanup"],
+        cleanup_args=None,
     )
 
-    cargo_tools = PACKAGE_LIST / "cargofile"
-    if not cargo_tools.exists():
-        raise InstallError(f"cannot find {cargo_tools} for cargo")
-    cargo_tools = [
-        ln.strip()
-        for ln in cargo_tools.read_text().splitlines()
-        if ln.strip() and not ln.startswith("#")
-    ]
+    cargo_tools = read_package_list(PACKAGE_LIST / "cargofile", "cargo")
     cargo = PackageManager(
         name="cargo",
         runner=runner,
         program=f"{HOME}/.cargo/bin/cargo",
-        bootstrap_cmd=Command(
+        bootstrap_cmd=lambda: Command(
             "sh",
             [
                 "-c",
@@ -285,13 +454,11 @@ def create_managers(runner: CmdRunner) -> Sequence[PackageManager]:
     )
 
     pip_tools = PACKAGE_LIST / "pipfile"
-    if not pip_tools.exists():
-        raise InstallError(f"cannot find {pip_tools} for uv")
     uv = PackageManager(
         name="uv",
         runner=runner,
         program="uv",
-        bootstrap_cmd=Command(
+        bootstrap_cmd=lambda: Command(
             "sh",
             [
                 "-c",
@@ -305,7 +472,47 @@ def create_managers(runner: CmdRunner) -> Sequence[PackageManager]:
     return [apt, brew, cargo, uv]
 
 
-if __name__ == "__main__":
+# --- Orchestration ----------------------------------------------------------
+async def run_managers(
+    managers: Sequence[PackageManager], keep_going: bool = False
+) -> None:
+    failures: list[BaseException] = []
+    # apt holds the dpkg lock, so it runs on its own before the others
+    for manager in managers:
+        if manager.name == "apt":
+            try:
+                await manager()
+            except Exception as exc:
+                if not keep_going:
+                    raise
+                failures.append(exc)
+    others = [manager for manager in managers if manager.name != "apt"]
+    tasks = [asyncio.ensure_future(manager()) for manager in others]
+    if keep_going:
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        failures += [r for r in results if isinstance(r, BaseException)]
+    elif tasks:
+        # Fail fast: the first error cancels the managers still running.
+        # asyncio.wait rather than TaskGroup, which needs Python 3.11
+        done, pending = await asyncio.wait(
+            tasks, return_when=asyncio.FIRST_EXCEPTION
+        )
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        failures += [
+            exc
+            for task in tasks
+            if task in done and (exc := task.exception()) is not None
+        ]
+    if failures:
+        for failure in failures[1:]:
+            logger.error("%s", failure)
+        raise failures[0]
+
+
+# --- Entry point ------------------------------------------------------------
+def main() -> None:
     parser = argparse.ArgumentParser(prog="update.py")
     parser.add_argument(
         "-n",
@@ -313,6 +520,17 @@ if __name__ == "__main__":
         action="store_true",
         help="Test commands without running",
     )
+    parser.add_argument(
+        "-k",
+        "--keep-going",
+        action="store_true",
+        help=(
+            "Keep running other package managers after one fails. Without"
+            " it the first failure stops the rest, but only their direct"
+            " child: pipelines such as the curl | sh bootstraps, and"
+            " anything a step backgrounds, run on until they exit"
+        ),
+    )
     parser.add_argument(
         "-V",
         "--version",
@@ -332,10 +550,18 @@ if __name__ == "__main__":
 
     args = parser.parse_args()
     if args.verbose:
-        logging.getLogger().setLevel(logging.DEBUG)
+        level = logging.DEBUG
     elif args.quiet:
-        logging.getLogger().setLevel(logging.ERROR)
+        level = logging.ERROR
+    else:
+        level = logging.INFO
+    logging.basicConfig(level=level, format="%(message)s")
 
     runner = CmdRunner(dry=args.dry_run, verbose=args.verbose, quiet=args.quiet)
-    for manager in create_managers(runner):
-        manager()
+    asyncio.run(
+        run_managers(create_managers(runner), keep_going=args.keep_going)
+    )
+
+
+if __name__ == "__main__":
+    main()